@@ -1,11 +1,16 @@
 from http.server import BaseHTTPRequestHandler
-from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
 import json
 import requests
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import math
 import os
+import queue
+import random
+import threading
+import time
 
 
 class Odds:
@@ -49,10 +54,13 @@ class Event:
         self.location = event_data.get('Location', '')
         self.tv_stations = event_data.get('TVStations', '')
         self.odds = [Odds(odd) for odd in event_data.get('Odds', [])]
+        self.odds_by_book = {(odd.sportsbook_id, odd.line_type): odd for odd in self.odds}
 
 class Events:
     def __init__(self):
         self.events: List[Event] = []
+        # Seconds since the feed last refreshed, when an old snapshot is being served
+        self.stale_for: Optional[float] = None
 
     def add_event(self, event_data: Dict):
         self.events.append(Event(event_data))
@@ -116,41 +124,367 @@ class NBAEvents(Events):
     def add_event(self, event_data: Dict):
         self.events.append(NBAEvent(event_data))
 
+class UpstreamError(Exception):
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[str] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+class FeedState:
+    def __init__(self):
+        self.data = None
+        self.etag = None
+        self.last_modified = None
+        self.failures = 0
+        self.opened_at = None
+        self.fetched_at = None
+        self.stale = False
+
+class UpstreamClient:
+    # Fetches JSON feeds with bounded, jittered retries and conditional requests. Each fetch_json
+    # call, retries included, finishes within `deadline` seconds, and a timed out feed that has a
+    # snapshot serves it instead of waiting again. After failure_threshold failed fetches a feed's
+    # circuit opens and its last good snapshot is served without touching the network until
+    # reset_timeout has passed. Snapshots older than max_stale seconds are never served.
+    retry_statuses = {429, 500, 502, 503, 504}
+
+    def __init__(self, timeout: float = 3, max_retries: int = 2, backoff_base: float = 0.25,
+                 backoff_cap: float = 2.0, failure_threshold: int = 3, reset_timeout: float = 60,
+                 deadline: float = 6, max_stale: float = 300, session: Optional[requests.Session] = None):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_stale = max_stale
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.session = session or requests.Session()
+        self.feeds: Dict[str, FeedState] = {}
+
+    def fetch_json(self, url: str):
+        feed = self.feeds.setdefault(url, FeedState())
+        half_open = False
+        if feed.opened_at is not None:
+            if time.monotonic() - feed.opened_at < self.reset_timeout:
+                return self.serve_snapshot(url, feed, UpstreamError(f"Circuit open for {url}"))
+            # Cooldown over: let a single probe through
+            half_open = True
+
+        attempts = 1 if half_open else self.max_retries + 1
+        deadline = time.monotonic() + self.deadline
+        error = None
+        for attempt in range(attempts):
+            if attempt:
+                delay = self.backoff_delay(attempt, error)
+                if time.monotonic() + delay >= deadline:
+                    break
+                time.sleep(delay)
+            # Sleep can overshoot, and requests rejects a timeout that is not positive
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                data = self.request(url, feed, min(self.timeout, remaining))
+            except UpstreamError as e:
+                error = e
+                if not e.retryable:
+                    break
+                continue
+            feed.failures = 0
+            feed.opened_at = None
+            feed.fetched_at = time.monotonic()
+            feed.stale = False
+            return data
+
+        feed.failures += 1
+        if half_open or feed.failures >= self.failure_threshold:
+            feed.opened_at = time.monotonic()
+        return self.serve_snapshot(url, feed, error or UpstreamError(f"Deadline exceeded for {url}"))
+
+    def serve_snapshot(self, url: str, feed: FeedState, error: UpstreamError):
+        if feed.data is None or time.monotonic() - feed.fetched_at > self.max_stale:
+            feed.stale = False
+            raise error
+        if not feed.stale:
+            print(f"Serving last good snapshot for {url}: {error}")
+        feed.stale = True
+        return feed.data
+
+    def staleness(self, url: str) -> Optional[float]:
+        feed = self.feeds.get(url)
+        if feed is None or not feed.stale:
+            return None
+        return time.monotonic() - feed.fetched_at
+
+    def request(self, url: str, feed: FeedState, timeout: float):
+        headers = {'Accept-Encoding': 'gzip'}
+        if feed.data is not None:
+            if feed.etag:
+                headers['If-None-Match'] = feed.etag
+            if feed.last_modified:
+                headers['If-Modified-Since'] = feed.last_modified
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=timeout)
+        except requests.Timeout as e:
+            # A hung upstream is unlikely to answer a second time; a snapshot is better than waiting
+            raise UpstreamError(f"Request to {url} timed out: {e}", retryable=feed.data is None)
+        except requests.RequestException as e:
+            raise UpstreamError(f"Request to {url} failed: {e}")
+        except ValueError as e:
+            raise UpstreamError(f"Request to {url} was rejected: {e}", retryable=False)
+
+        if response.status_code == 304 and feed.data is not None:
+            return feed.data
+        if response.status_code != 200:
+            raise UpstreamError(f"Request to {url} returned {response.status_code}",
+                                retryable=response.status_code in self.retry_statuses,
+                                retry_after=response.headers.get('Retry-After'))
+
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise UpstreamError(f"Invalid JSON from {url}: {e}")
+        if not isinstance(data, list):
+            raise UpstreamError(f"Unexpected payload from {url}: {type(data).__name__}")
+
+        feed.data = data
+        feed.etag = response.headers.get('ETag')
+        feed.last_modified = response.headers.get('Last-Modified')
+        return data
+
+    def backoff_delay(self, attempt: int, error: Optional[UpstreamError]) -> float:
+        if error is not None and error.retry_after and error.retry_after.isdigit():
+            return min(float(error.retry_after), self.backoff_cap)
+        # Full jitter keeps concurrent retries from lining up
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+upstream_client = UpstreamClient(
+    timeout=float(os.environ.get('UPSTREAM_TIMEOUT', 3)),
+    max_retries=int(os.environ.get('UPSTREAM_MAX_RETRIES', 2)),
+    deadline=float(os.environ.get('UPSTREAM_DEADLINE', 6)),
+    max_stale=float(os.environ.get('UPSTREAM_MAX_STALE', 300))
+)
+parsed_feeds: Dict[str, Tuple[object, Events]] = {}
+
 def fetch_sports_data(url: str, event_class: type) -> Events:
-    response = requests.get(url)
-    data = json.loads(response.text)
-    
+    events = parse_sports_data(url, event_class)
+    events.stale_for = upstream_client.staleness(url)
+    return events
+
+def parse_sports_data(url: str, event_class: type) -> Events:
+    try:
+        data = upstream_client.fetch_json(url)
+    except UpstreamError as e:
+        print(f"Error fetching {url}: {e}")
+        return event_class()
+
+    # Unchanged snapshots come back as the same object, so the parsed events can be reused
+    cached = parsed_feeds.get(url)
+    if cached is not None and cached[0] is data and isinstance(cached[1], event_class):
+        return cached[1]
+
     events = event_class()
-    for event_data in data:
-        events.add_event(event_data)
-    
+    try:
+        for event_data in data:
+            events.add_event(event_data)
+    except (TypeError, ValueError, AttributeError) as e:
+        print(f"Error parsing {url}: {e}")
+        return cached[1] if cached is not None and isinstance(cached[1], event_class) else event_class()
+
+    parsed_feeds[url] = (data, events)
     return events
 
 # BookMaker is 5
-sportsbook_names = {
-    1: 'Pinnacle',
-    89: 'FanDuel',
-    83: 'DraftKings',
-    28: 'Caesars',
-    87: 'BetMGM',
-    85: 'BetRivers',
-    8: 'bet365',
-    86: 'PointsBet',
-    98: 'Bet99',
-    100: 'BetVictor',
-    101: 'Betano',
-    139: 'theScore',
-    119: 'Fanatics'
+DEFAULT_CONFIG = {
+    'base_url': 'https://www.lunosoftware.com/sportsdata/SportsDataService.svc/gamesOddsForDateWeek/{sport_id}?&sportsbookIDList={sportsbook_ids}',
+    'sportsbooks': {
+        '1': 'Pinnacle',
+        '89': 'FanDuel',
+        '83': 'DraftKings',
+        '28': 'Caesars',
+        '87': 'BetMGM',
+        '85': 'BetRivers',
+        '8': 'bet365',
+        '86': 'PointsBet',
+        '98': 'Bet99',
+        '100': 'BetVictor',
+        '101': 'Betano',
+        '139': 'theScore',
+        '119': 'Fanatics'
+    },
+    'sharp_books': [1],
+    # The first line type of each league is its headline table; NHL shows the rest as period rows
+    'leagues': {
+        'CFB': {'sport_id': 3, 'enabled': False, 'line_types': [1, 2]},
+        'NFL': {'sport_id': 2, 'enabled': True, 'line_types': [1, 2]},
+        'MLB': {'sport_id': 1, 'enabled': False, 'line_types': [1, 2]},
+        'NBA': {'sport_id': 4, 'enabled': True, 'line_types': [1, 2]},
+        'NHL': {'sport_id': 6, 'enabled': True, 'line_types': [1, 4, 5, 6]}
+    },
+    'line_types': {
+        '1': 'Full Game',
+        '2': 'First Half',
+        '3': 'Second Half',
+        '4': 'First Period',
+        '5': 'Second Period',
+        '6': 'Third Period'
+    }
 }
 
-def find_plus_ev_bets(sports_data: Dict[str, Events]) -> List[Dict]:
+league_event_classes = {
+    'CFB': CFBEvents,
+    'NFL': NFLEvents,
+    'MLB': MLBEvents,
+    'NBA': NBAEvents,
+    'NHL': NHLEvents
+}
+
+class Registry:
+    def __init__(self, base_url: str, sportsbooks: Dict[int, str], sharp_books: List[int],
+                 leagues: Dict[str, int], line_types: Dict[int, str], league_line_types: Dict[str, List[int]],
+                 all_sportsbooks: Optional[Dict[int, str]] = None, fetch_ids: Optional[List[int]] = None):
+        self.base_url = base_url
+        self.sportsbooks = sportsbooks
+        self.all_sportsbooks = all_sportsbooks if all_sportsbooks is not None else sportsbooks
+        self.sharp_books = sharp_books
+        self.leagues = leagues
+        self.line_types = line_types
+        self.league_line_types = league_line_types
+        # Sharp books are always fetched since fair odds depend on them, even when not displayed.
+        # Narrowed registries keep their parent's fetch_ids so every request shares one URL (and
+        # one cached snapshot) per league; per-request book narrowing only trims compute and rendering.
+        if fetch_ids is None:
+            fetch_ids = list(sportsbooks) + [id for id in sharp_books if id not in sportsbooks]
+        self.fetch_ids = fetch_ids
+        self.columns = list(sportsbooks.items())
+        self.header_html = ''.join(f'<th>{name}</th>' for _, name in self.columns)
+
+    def line_types_for(self, league: Optional[str]) -> List[int]:
+        return self.league_line_types.get(league, list(self.line_types))
+
+    def book_name(self, sportsbook_id: int) -> str:
+        return self.all_sportsbooks.get(sportsbook_id, 'Unknown')
+
+    def league_url(self, league: str) -> str:
+        return self.base_url.format(sport_id=self.leagues[league],
+                                    sportsbook_ids=','.join(str(id) for id in self.fetch_ids))
+
+    def narrow(self, books: Optional[List[str]] = None, leagues: Optional[List[str]] = None,
+               keep_fetch_ids: bool = True) -> 'Registry':
+        sportsbooks = self.sportsbooks
+        if books:
+            ids_by_name = {name.lower(): id for id, name in self.sportsbooks.items()}
+            unknown = [book for book in books if book.lower() not in ids_by_name]
+            if unknown:
+                raise ValueError(f"Unknown sportsbooks: {', '.join(unknown)}")
+            selected = {ids_by_name[book.lower()] for book in books}
+            sportsbooks = {id: name for id, name in self.sportsbooks.items() if id in selected}
+
+        selected_leagues = self.leagues
+        if leagues:
+            unknown = [league for league in leagues if league.upper() not in self.leagues]
+            if unknown:
+                raise ValueError(f"Unknown leagues: {', '.join(unknown)}")
+            selected = {league.upper() for league in leagues}
+            selected_leagues = {league: sport_id for league, sport_id in self.leagues.items() if league in selected}
+
+        return Registry(self.base_url, sportsbooks, self.sharp_books, selected_leagues, self.line_types,
+                        self.league_line_types, self.all_sportsbooks, self.fetch_ids if keep_fetch_ids else None)
+
+
+def parse_registry_config(config: Dict) -> Registry:
+    base_url = config.get('base_url')
+    if not isinstance(base_url, str) or '{sport_id}' not in base_url or '{sportsbook_ids}' not in base_url:
+        raise ValueError("base_url must contain {sport_id} and {sportsbook_ids} placeholders")
+
+    try:
+        sportsbooks = {int(id): str(name) for id, name in config.get('sportsbooks', {}).items()}
+        line_types = {int(id): str(name) for id, name in config.get('line_types', {}).items()}
+        sharp_books = [int(id) for id in config.get('sharp_books', [])]
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"Invalid registry config: {e}")
+
+    if not sportsbooks:
+        raise ValueError("At least one sportsbook must be configured")
+    if len(set(name.lower() for name in sportsbooks.values())) != len(sportsbooks):
+        raise ValueError("Sportsbook names must be unique")
+    if not sharp_books:
+        raise ValueError("At least one sharp book must be configured")
+    unknown = [id for id in sharp_books if id not in sportsbooks]
+    if unknown:
+        raise ValueError(f"Sharp books are not configured sportsbooks: {unknown}")
+    if not line_types:
+        raise ValueError("At least one line type must be configured")
+
+    leagues = {}
+    league_line_types = {}
+    for league, settings in config.get('leagues', {}).items():
+        league = league.upper()
+        if league not in league_event_classes:
+            raise ValueError(f"Unsupported league: {league}")
+        if not isinstance(settings, dict) or not isinstance(settings.get('sport_id'), int):
+            raise ValueError(f"League {league} needs an integer sport_id")
+        configured = settings.get('line_types', list(line_types))
+        if not isinstance(configured, list) or not all(isinstance(id, int) for id in configured):
+            raise ValueError(f"League {league} line_types must be a list of integer ids")
+        if settings.get('enabled', True):
+            # Leagues keep only the line types this deployment has configured
+            selected = [id for id in configured if id in line_types]
+            if not selected:
+                raise ValueError(f"League {league} has none of the configured line types")
+            leagues[league] = settings['sport_id']
+            league_line_types[league] = selected
+    if not leagues:
+        raise ValueError("At least one league must be enabled")
+
+    return Registry(base_url, sportsbooks, sharp_books, leagues, line_types, league_line_types)
+
+def load_registry() -> Registry:
+    # PLUSEV_CONFIG points at a JSON file whose top-level keys replace the defaults;
+    # PLUSEV_SPORTSBOOKS / PLUSEV_LEAGUES narrow the universe for a deployment by name
+    config = dict(DEFAULT_CONFIG)
+    config_path = os.environ.get('PLUSEV_CONFIG')
+    if config_path:
+        with open(config_path) as f:
+            config.update(json.load(f))
+
+    loaded = parse_registry_config(config)
+    books = [book.strip() for book in os.environ.get('PLUSEV_SPORTSBOOKS', '').split(',') if book.strip()]
+    leagues = [league.strip() for league in os.environ.get('PLUSEV_LEAGUES', '').split(',') if league.strip()]
+    if books or leagues:
+        # A deployment's narrowing does shrink what is fetched
+        loaded = loaded.narrow(books, leagues, keep_fetch_ids=False)
+    return loaded
+
+registry = load_registry()
+
+def fetch_all_sports(active_registry: Optional[Registry] = None) -> Dict[str, Events]:
+    active_registry = active_registry or registry
+    leagues = list(active_registry.leagues)
+    # Feeds are independent, so a slow one only costs its own deadline rather than adding to the others
+    with ThreadPoolExecutor(max_workers=max(1, len(leagues))) as executor:
+        results = executor.map(lambda league: fetch_sports_data(active_registry.league_url(league), league_event_classes[league]), leagues)
+        return dict(zip(leagues, results))
+
+def find_plus_ev_bets(sports_data: Dict[str, Events], active_registry: Optional[Registry] = None) -> List[Dict]:
+    active_registry = active_registry or registry
     plus_ev_bets = []
     for sport, events in sports_data.items():
+        line_types = active_registry.line_types_for(sport)
         for event in events.events:
+            fair_odds_by_line_type = {}
             for odd in event.odds:
-                line_type_name = get_line_type_name(odd.line_type)
-                fair_away_odds = calculate_fair_odds("away", event, 1, odd.line_type)
-                fair_home_odds = calculate_fair_odds("home", event, 1, odd.line_type)
+                if odd.sportsbook_id not in active_registry.sportsbooks or odd.line_type not in line_types:
+                    continue
+                line_type_name = get_line_type_name(odd.line_type, active_registry)
+                if odd.line_type not in fair_odds_by_line_type:
+                    fair_odds_by_line_type[odd.line_type] = (
+                        calculate_fair_odds("away", event, active_registry.sharp_books, odd.line_type),
+                        calculate_fair_odds("home", event, active_registry.sharp_books, odd.line_type)
+                    )
+                fair_away_odds, fair_home_odds = fair_odds_by_line_type[odd.line_type]
                 
                 if isinstance(odd.away_line, (int, float)) and isinstance(fair_away_odds, (int, float)):
                     ev_away = calculate_ev_percentage(odd.away_line, fair_away_odds)
@@ -160,7 +494,7 @@ def find_plus_ev_bets(sports_data: Dict[str, Events]) -> List[Dict]:
                             'line_type': line_type_name,
                             'game': f"{event.away_team.name} @ {event.home_team.name}",
                             'team': event.away_team.name,
-                            'book': sportsbook_names.get(odd.sportsbook_id, 'Unknown'),
+                            'book': active_registry.book_name(odd.sportsbook_id),
                             'odds': odd.away_line,
                             'fair_odds': fair_away_odds,
                             'ev': ev_away
@@ -174,7 +508,7 @@ def find_plus_ev_bets(sports_data: Dict[str, Events]) -> List[Dict]:
                             'line_type': line_type_name,
                             'game': f"{event.away_team.name} @ {event.home_team.name}",
                             'team': event.home_team.name,
-                            'book': sportsbook_names.get(odd.sportsbook_id, 'Unknown'),
+                            'book': active_registry.book_name(odd.sportsbook_id),
                             'odds': odd.home_line,
                             'fair_odds': fair_home_odds,
                             'ev': ev_home
@@ -183,36 +517,42 @@ def find_plus_ev_bets(sports_data: Dict[str, Events]) -> List[Dict]:
     return sorted(plus_ev_bets, key=lambda x: x['ev'], reverse=True)
 
 
-def find_arbitrage_opportunities(sports_data: Dict[str, Events]) -> List[Dict]:
+def find_arbitrage_opportunities(sports_data: Dict[str, Events], active_registry: Optional[Registry] = None, stake: float = 100) -> List[Dict]:
+    active_registry = active_registry or registry
     arbitrage_opportunities = []
     for sport, events in sports_data.items():
+        line_types = active_registry.line_types_for(sport)
         for event in events.events:
-            for line_type in set(odd.line_type for odd in event.odds):
-                moneyline_odds = [odd for odd in event.odds if odd.line_type == line_type]
-                
+            odds_by_line_type = {}
+            for odd in event.odds:
+                if odd.sportsbook_id in active_registry.sportsbooks and odd.line_type in line_types:
+                    odds_by_line_type.setdefault(odd.line_type, []).append(odd)
+            for moneyline_odds in odds_by_line_type.values():
                 for i in range(len(moneyline_odds)):
                     for j in range(i + 1, len(moneyline_odds)):
-                        arb = calculate_arbitrage(moneyline_odds[i], moneyline_odds[j], event, sport)
+                        arb = calculate_arbitrage(moneyline_odds[i], moneyline_odds[j], event, sport, stake, active_registry)
                         if arb:
                             arbitrage_opportunities.append(arb)
     
     return sorted(arbitrage_opportunities, key=lambda x: x['profit'], reverse=True)
 
 
-def calculate_ev_percentage(odds: float, fair_odds: float) -> float:
-    def odds_to_probability(odds):
-        if odds > 0:
-            return 100 / (odds + 100)
-        else:
-            return abs(odds) / (abs(odds) + 100)
+def american_to_probability(odds: float) -> float:
+    return 100 / (odds + 100) if odds > 0 else abs(odds) / (abs(odds) + 100)
 
-    implied_probability = odds_to_probability(odds)
-    fair_probability = odds_to_probability(fair_odds)
+def american_to_decimal(odds: float) -> float:
+    return (odds / 100) + 1 if odds > 0 else (100 / abs(odds)) + 1
+
+def calculate_ev_percentage(odds: float, fair_odds: float) -> float:
+    implied_probability = american_to_probability(odds)
+    fair_probability = american_to_probability(fair_odds)
 
     ev = (fair_probability * (1 / implied_probability) - 1) * 100
     return round(ev, 2)
 
-def create_table(events: Events, bet_type: str) -> str:
+def create_table(events: Events, bet_type: str, active_registry: Optional[Registry] = None, league: Optional[str] = None) -> str:
+    active_registry = active_registry or registry
+    line_types = active_registry.line_types_for(league)
     all_tables = ""
     for event in events.events:
         date = event.start_time.strftime('%Y-%m-%d %H:%M')
@@ -224,30 +564,30 @@ def create_table(events: Events, bet_type: str) -> str:
         all_tables += f'<p>Date: {date} @{location}</p>'
         
         if isinstance(event, NHLEvent):
-            all_tables += create_odds_table(event, bet_type, 1, "NHL Game")
+            all_tables += create_odds_table(event, bet_type, line_types[0], "NHL Game", active_registry, line_types[1:])
         else:
-            # Full Game Table
-            all_tables += create_odds_table(event, bet_type, 1, "Full Game")
-            
-            # First Half Table
-            all_tables += create_odds_table(event, bet_type, 2, "First Half")
+            # One table per line type: Full Game, First Half, ...
+            for line_type in line_types:
+                all_tables += create_odds_table(event, bet_type, line_type, get_line_type_name(line_type, active_registry), active_registry)
         
         all_tables += '<hr>'  # Add a horizontal line between events
     
     return all_tables
 
-def calculate_arbitrage(odds1: Odds, odds2: Odds, event: Event, sport: str) -> Dict:
+def calculate_arbitrage(odds1: Odds, odds2: Odds, event: Event, sport: str, stake: float = 100, active_registry: Optional[Registry] = None) -> Dict:
+    active_registry = active_registry or registry
+
     def implied_probability(odds):
         if odds is None:
             return None
         try:
-            return 1 / (1 + (odds / 100)) if odds > 0 else abs(odds) / (abs(odds) + 100)
+            return american_to_probability(odds)
         except Exception as e:
             print(f"Error calculating implied probability for odds {odds}: {e}")
             return None
 
-    book1 = sportsbook_names.get(odds1.sportsbook_id, 'Unknown')
-    book2 = sportsbook_names.get(odds2.sportsbook_id, 'Unknown')
+    book1 = active_registry.book_name(odds1.sportsbook_id)
+    book2 = active_registry.book_name(odds2.sportsbook_id)
     
     prob1_away = implied_probability(odds1.away_line)
     prob1_home = implied_probability(odds1.home_line)
@@ -257,10 +597,9 @@ def calculate_arbitrage(odds1: Odds, odds2: Odds, event: Event, sport: str) -> D
     if None in (prob1_away, prob1_home, prob2_away, prob2_home):
         return None
 
-    line_type_name = get_line_type_name(odds1.line_type)
+    line_type_name = get_line_type_name(odds1.line_type, active_registry)
 
     if (prob1_away + prob2_home < 1) or (prob1_home + prob2_away < 1):
-        stake = 100  # Assume $100 total stake
         if prob1_away + prob2_home < 1:
             stake1 = stake * prob2_home / (prob1_away + prob2_home)
             stake2 = stake - stake1
@@ -277,6 +616,7 @@ def calculate_arbitrage(odds1: Odds, odds2: Odds, event: Event, sport: str) -> D
                 'stake2': round(stake2, 2),
                 'team2': event.home_team.name,
                 'profit': round(stake / (prob1_away + prob2_home) - stake, 2),
+                'stake': stake,
                 'line_type': line_type_name
             }
         else:
@@ -295,55 +635,51 @@ def calculate_arbitrage(odds1: Odds, odds2: Odds, event: Event, sport: str) -> D
                 'stake2': round(stake2, 2),
                 'team2': event.away_team.name,
                 'profit': round(stake / (prob1_home + prob2_away) - stake, 2),
+                'stake': stake,
                 'line_type': line_type_name
             }
     
     return None
 
-def get_line_type_name(line_type: int) -> str:
-    line_type_map = {
-        1: "Full Game",
-        2: "First Half",
-        3: "Second Half",
-        4: "First Period",
-        5: "Second Period",
-        6: "Third Period"
-    }
-    return line_type_map.get(line_type, f"Unknown ({line_type})")
+def get_line_type_name(line_type: int, active_registry: Optional[Registry] = None) -> str:
+    return (active_registry or registry).line_types.get(line_type, f"Unknown ({line_type})")
 
-def create_odds_table(event: Event, bet_type: str, line_type: int, table_title: str) -> str:
+def create_odds_table(event: Event, bet_type: str, line_type: int, table_title: str, active_registry: Optional[Registry] = None,
+                      period_line_types: Optional[List[int]] = None) -> str:
+    active_registry = active_registry or registry
     table = f'<h4>{table_title}</h4>'
     table += '<table><tr><th class="team-name">Team</th>'
     table += '<th>Fair Odds</th>'
-    for name in sportsbook_names.values():
-        table += f'<th>{name}</th>'
+    table += active_registry.header_html
     table += '</tr>'
 
-    table += create_team_row(event, "away", bet_type, line_type)
-    table += create_team_row(event, "home", bet_type, line_type)
+    table += create_team_row(event, "away", bet_type, line_type, active_registry)
+    table += create_team_row(event, "home", bet_type, line_type, active_registry)
 
-    if isinstance(event, NHLEvent):
-        table += create_nhl_period_rows(event, bet_type)
+    if period_line_types:
+        table += create_nhl_period_rows(event, bet_type, period_line_types, active_registry)
 
     table += '</table>'
     return table
 
-def create_nhl_period_rows(event: NHLEvent, bet_type: str) -> str:
+def create_nhl_period_rows(event: NHLEvent, bet_type: str, line_types: List[int], active_registry: Optional[Registry] = None) -> str:
+    active_registry = active_registry or registry
     rows = ""
-    for period in range(1, 4):
-        rows += f'<tr><td colspan="{len(sportsbook_names) + 2}" style="text-align: center; font-weight: bold; background-color: #f0f0f0;">Period {period}</td></tr>'
-        rows += create_team_row(event, "away", bet_type, period + 3)
-        rows += create_team_row(event, "home", bet_type, period + 3)
+    for line_type in line_types:
+        rows += f'<tr><td colspan="{len(active_registry.columns) + 2}" style="text-align: center; font-weight: bold; background-color: #f0f0f0;">{get_line_type_name(line_type, active_registry)}</td></tr>'
+        rows += create_team_row(event, "away", bet_type, line_type, active_registry)
+        rows += create_team_row(event, "home", bet_type, line_type, active_registry)
     return rows
 
-def create_team_row(event: Event, team: str, bet_type: str, line_type: int) -> str:
+def create_team_row(event: Event, team: str, bet_type: str, line_type: int, active_registry: Optional[Registry] = None) -> str:
+    active_registry = active_registry or registry
     team_name = event.away_team.name if team == "away" else event.home_team.name
     row = f'<tr><td class="team-name">{team_name}</td>'
-    fair_odds = calculate_fair_odds(team, event, 1, line_type)
+    fair_odds = calculate_fair_odds(team, event, active_registry.sharp_books, line_type)
     row += f'<td>{fair_odds}</td>'
     
-    for sportsbook_id in sportsbook_names.keys():
-        odds = next((odd for odd in event.odds if odd.sportsbook_id == sportsbook_id and odd.line_type == line_type), None)
+    for sportsbook_id, _ in active_registry.columns:
+        odds = event.odds_by_book.get((sportsbook_id, line_type))
         
         if bet_type == 'moneyline':
             row += add_cell(odds, f'{team}_line', fair_odds)
@@ -380,8 +716,9 @@ def add_total_cell(odds, over_under):
     else:
         return '<td>N/A</td>'
 
-def calculate_fair_odds(team, event: Event, pinnacle_id: int, line_type: int) -> str:
-    odds = next((odd for odd in event.odds if odd.sportsbook_id == pinnacle_id and odd.line_type == line_type), None)
+def calculate_fair_odds(team, event: Event, sharp_books: List[int], line_type: int) -> str:
+    # First configured sharp book that has posted this line is the reference
+    odds = next((event.odds_by_book[(id, line_type)] for id in sharp_books if (id, line_type) in event.odds_by_book), None)
     
     if odds is None:
         return 'N/A'
@@ -396,14 +733,6 @@ def calculate_fair_odds(team, event: Event, pinnacle_id: int, line_type: int) ->
 
 
 def calculate_no_vig_odds(team, away_odds, home_odds):
-    def american_to_decimal(american_odds):
-        if american_odds is None:
-            return None
-        if american_odds > 0:
-            return (american_odds / 100) + 1
-        else:
-            return (100 / abs(american_odds)) + 1
-
     def decimal_to_american(decimal_odds):
         if decimal_odds is None:
             return None
@@ -430,7 +759,83 @@ def calculate_no_vig_odds(team, away_odds, home_odds):
     else:
         return decimal_to_american(fair_home_decimal)
 
-def generate_html(sports_data: Dict[str, Events]) -> str:
+def calculate_kelly_fraction(odds: float, fair_odds: float, fraction: float = 1.0) -> float:
+    # Share of bankroll to stake on a single bet at `odds` whose true price is `fair_odds`
+    probability = american_to_probability(fair_odds)
+    net_odds = american_to_decimal(odds) - 1
+    kelly = probability - (1 - probability) / net_odds
+    return max(0.0, kelly) * fraction
+
+def optimize_market_fractions(outcomes: List[Tuple[float, float]]) -> List[float]:
+    # Full Kelly for mutually exclusive outcomes of one market, given (probability, decimal odds) for
+    # each candidate bet. Outcomes are added in order of expected return while that beats the
+    # return R of keeping the rest of the bankroll back; each then gets probability - R / odds.
+    total_probability = sum(probability for probability, _ in outcomes)
+    if total_probability > 1:
+        # Rounded fair odds can put the sides of a market past 1 in total
+        outcomes = [(probability / total_probability, decimal_odds) for probability, decimal_odds in outcomes]
+    order = sorted(range(len(outcomes)), key=lambda i: outcomes[i][0] * outcomes[i][1], reverse=True)
+    selected = []
+    reserve = 1.0
+    probability_sum = 0.0
+    inverse_odds_sum = 0.0
+    for i in order:
+        probability, decimal_odds = outcomes[i]
+        if probability * decimal_odds <= reserve:
+            break
+        if inverse_odds_sum + 1 / decimal_odds >= 1:
+            # Stop rather than divide by a non-positive remainder
+            break
+        probability_sum += probability
+        inverse_odds_sum += 1 / decimal_odds
+        selected.append(i)
+        reserve = max(0.0, (1 - probability_sum) / (1 - inverse_odds_sum))
+
+    fractions = [0.0] * len(outcomes)
+    for i in selected:
+        probability, decimal_odds = outcomes[i]
+        fractions[i] = max(0.0, probability - reserve / decimal_odds)
+    return fractions
+
+def size_plus_ev_bets(plus_ev_bets: List[Dict], bankroll: float, kelly_fraction: float = 0.25,
+                      max_bet_fraction: float = 0.05, max_exposure: float = 0.5) -> List[Dict]:
+    sized_bets = [dict(bet) for bet in plus_ev_bets]
+    markets: Dict[Tuple, Dict[str, int]] = {}
+    for i, bet in enumerate(sized_bets):
+        bet['fair_probability'] = round(american_to_probability(bet['fair_odds']), 4)
+        # Filled in from the joint market solution below, so dominated prices show 0 like their stake
+        bet['kelly'] = 0.0
+        bet['stake'] = 0.0
+
+        # The same side at several books is one bet; only the best price is worth taking
+        sides = markets.setdefault((bet['sport'], bet['game'], bet['line_type']), {})
+        best = sides.get(bet['team'])
+        if best is None or american_to_decimal(bet['odds']) > american_to_decimal(sized_bets[best]['odds']):
+            sides[bet['team']] = i
+
+    # Markets are independent, so the whole slate is sized in one pass and then scaled to the limits
+    allocations: Dict[int, float] = {}
+    for sides in markets.values():
+        indexes = list(sides.values())
+        outcomes = [(american_to_probability(sized_bets[i]['fair_odds']), american_to_decimal(sized_bets[i]['odds'])) for i in indexes]
+        fractions = optimize_market_fractions(outcomes)
+        largest = max(fractions) * kelly_fraction
+        # Scale the market as a whole so hedged sides keep their ratio under the per-bet cap
+        market_scale = kelly_fraction * (max_bet_fraction / largest if largest > max_bet_fraction else 1.0)
+        for i, fraction in zip(indexes, fractions):
+            sized_bets[i]['kelly'] = round(fraction * 100, 2)
+            if fraction > 0:
+                allocations[i] = fraction * market_scale
+
+    exposure = sum(allocations.values())
+    scale = max_exposure / exposure if exposure > max_exposure else 1.0
+    for i, fraction in allocations.items():
+        sized_bets[i]['stake'] = round(bankroll * fraction * scale, 2)
+
+    return sized_bets
+
+def generate_html(sports_data: Dict[str, Events], all_plus_ev_bets: Optional[List[Dict]] = None, all_arbitrage_opportunities: Optional[List[Dict]] = None, active_registry: Optional[Registry] = None) -> str:
+    active_registry = active_registry or registry
     html = """
     <!DOCTYPE html>
     <html lang="en">
@@ -440,6 +845,7 @@ def generate_html(sports_data: Dict[str, Events]) -> str:
         <title>Sports Odds</title>
         <style>
             .highlight-green { background-color: #d4f4d7; }
+            .stale-notice { text-align: center; padding: 10px; background-color: #fff3cd; }
             body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background-color: #f0f0f0; }
             .container { max-width: 95%; margin: 0 auto; background-color: white; border-radius: 10px; box-shadow: 0 0 10px rgba(0,0,0,0.1); overflow: hidden; }
             table { width: 100%; border-collapse: collapse; margin-bottom: 20px; font-size: 14px; }
@@ -505,7 +911,7 @@ def generate_html(sports_data: Dict[str, Events]) -> str:
     """
     
     # Add checkboxes for each sportsbook
-    for id, name in sportsbook_names.items():
+    for id, name in active_registry.columns:
         html += f"""
                 <label>
                     <input type="checkbox" name="sportsbook" value="{name}" checked onchange="filterTables()">
@@ -524,22 +930,26 @@ def generate_html(sports_data: Dict[str, Events]) -> str:
     html += '</div>'
 
     for sport, events in sports_data.items():
+        stale_notice = ''
+        if events.stale_for is not None:
+            stale_notice = f'<p class="stale-notice">{sport} odds could not be refreshed; showing data from {round(events.stale_for / 60)} min ago.</p>'
         html += f"""
         <div id="{sport}" class="content">
             <h2>{sport} Odds</h2>
+            {stale_notice}
             <div class="tabs">
                 <div class="tab active" data-bet-type="moneyline" onclick="showBetType('{sport}', 'moneyline')">Moneyline</div>
                 <div class="tab" data-bet-type="spread" onclick="showBetType('{sport}', 'spread')">Spread</div>
                 <div class="tab" data-bet-type="total" onclick="showBetType('{sport}', 'total')">Total</div>
             </div>
             <div id="{sport}-moneyline" class="content active">
-                {create_table(events, 'moneyline')}
+                {create_table(events, 'moneyline', active_registry, sport)}
             </div>
             <div id="{sport}-spread" class="content">
-                {create_table(events, 'spread')}
+                {create_table(events, 'spread', active_registry, sport)}
             </div>
             <div id="{sport}-total" class="content">
-                {create_table(events, 'total')}
+                {create_table(events, 'total', active_registry, sport)}
             </div>
         </div>
         """
@@ -558,12 +968,18 @@ def generate_html(sports_data: Dict[str, Events]) -> str:
                     <th>Odds</th>
                     <th>Fair Odds</th>
                     <th>EV%</th>
-                </tr>
     """
     
-    all_plus_ev_bets = find_plus_ev_bets(sports_data)
+    if all_plus_ev_bets is None:
+        all_plus_ev_bets = find_plus_ev_bets(sports_data, active_registry)
+
+    show_stakes = any('stake' in bet for bet in all_plus_ev_bets)
+    if show_stakes:
+        html += '<th>Kelly%</th><th>Stake</th>'
+    html += '</tr>'
     
     for bet in all_plus_ev_bets:
+        stake_cells = f"<td>{bet['kelly']}%</td><td>${bet['stake']}</td>" if show_stakes else ''
         html += f"""
             <tr data-book="{bet['book']}">
                 <td>{bet['sport']}</td>
@@ -573,7 +989,8 @@ def generate_html(sports_data: Dict[str, Events]) -> str:
                 <td>{bet['book']}</td>
                 <td>{bet['odds']}</td>
                 <td>{bet['fair_odds']}</td>
-                <td>{bet['ev']}%</td>               
+                <td>{bet['ev']}%</td>
+                {stake_cells}
             </tr>
         """
     
@@ -599,7 +1016,8 @@ def generate_html(sports_data: Dict[str, Events]) -> str:
                 </tr>
     """
     
-    all_arbitrage_opportunities = find_arbitrage_opportunities(sports_data)
+    if all_arbitrage_opportunities is None:
+        all_arbitrage_opportunities = find_arbitrage_opportunities(sports_data, active_registry)
     
     for arb in all_arbitrage_opportunities:
         html += f"""
@@ -706,28 +1124,298 @@ def generate_html(sports_data: Dict[str, Events]) -> str:
 
     return html
 
+def opportunity_key(opportunity: Dict) -> Tuple:
+    if 'book1' in opportunity:
+        return ('arbitrage', opportunity['sport'], opportunity['game'], opportunity['line_type'],
+                opportunity['book1'], opportunity['team1'], opportunity['book2'], opportunity['team2'])
+    return ('plus_ev', opportunity['sport'], opportunity['game'], opportunity['line_type'],
+            opportunity['book'], opportunity['team'])
+
+def opportunity_value(opportunity: Dict) -> float:
+    if 'book1' in opportunity:
+        return opportunity['profit'] / opportunity['stake'] * 100
+    return opportunity['ev']
+
+
+class OpportunityTracker:
+    # Keeps the set of currently open opportunities between polls and reports only what changed.
+    # Improvements are measured against what subscribers were last told, not the latest value,
+    # so a line bouncing below that level stays quiet.
+    def __init__(self, min_improvement: float = 0.5):
+        self.min_improvement = min_improvement
+        self.notified: Dict[Tuple, Dict] = {}
+        self.current: Dict[Tuple, Dict] = {}
+
+    def update(self, plus_ev_bets: List[Dict], arbitrage_opportunities: List[Dict]) -> List[Dict]:
+        alerts = []
+        now = datetime.utcnow().isoformat()
+        current = {}
+        for opportunity in plus_ev_bets + arbitrage_opportunities:
+            current[opportunity_key(opportunity)] = opportunity
+
+        for key, opportunity in current.items():
+            previous = self.notified.get(key)
+            if previous is None:
+                alerts.append(self.make_alert('opened', key, opportunity, None, now))
+                self.notified[key] = opportunity
+            elif opportunity_value(opportunity) >= opportunity_value(previous) + self.min_improvement:
+                alerts.append(self.make_alert('improved', key, opportunity, previous, now))
+                self.notified[key] = opportunity
+
+        for key in [key for key in self.notified if key not in current]:
+            del self.notified[key]
+            alerts.append(self.make_alert('closed', key, self.current[key], None, now))
+
+        self.current = current
+        return alerts
+
+    def make_alert(self, event: str, key: Tuple, opportunity: Dict, previous: Optional[Dict], timestamp: str) -> Dict:
+        return {
+            'event': event,
+            'kind': key[0],
+            'key': key,
+            'opportunity': opportunity,
+            'previous': previous,
+            'time': timestamp
+        }
+
+
+def format_alert(alert: Dict) -> str:
+    opportunity = alert['opportunity']
+    if alert['kind'] == 'arbitrage':
+        summary = (f"{opportunity['game']} ({opportunity['line_type']}): "
+                   f"{opportunity['team1']} {opportunity['odds1']} @ {opportunity['book1']} / "
+                   f"{opportunity['team2']} {opportunity['odds2']} @ {opportunity['book2']}, "
+                   f"profit ${opportunity['profit']}")
+    else:
+        summary = (f"{opportunity['game']} ({opportunity['line_type']}): "
+                   f"{opportunity['team']} {opportunity['odds']} @ {opportunity['book']}, "
+                   f"fair {opportunity['fair_odds']}, EV {opportunity['ev']}%")
+    return f"[{alert['event'].upper()}] {opportunity['sport']} {summary}"
+
+
+class AlertSink:
+    def send(self, alerts: List[Dict]):
+        raise NotImplementedError
+
+class StdoutAlertSink(AlertSink):
+    def send(self, alerts: List[Dict]):
+        for alert in alerts:
+            print(format_alert(alert), flush=True)
+
+class FileAlertSink(AlertSink):
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, alerts: List[Dict]):
+        with open(self.path, 'a') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert) + '\n')
+
+class WebhookAlertSink(AlertSink):
+    def __init__(self, url: str, timeout: float = 5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alerts: List[Dict]):
+        response = requests.post(self.url, json={
+            'alerts': alerts,
+            'text': '\n'.join(format_alert(alert) for alert in alerts)
+        }, timeout=self.timeout)
+        response.raise_for_status()
+
+class MemoryAlertSink(AlertSink):
+    # Local stand-in for a real sink: records every batch it receives
+    def __init__(self):
+        self.batches: List[List[Dict]] = []
+
+    def send(self, alerts: List[Dict]):
+        self.batches.append(list(alerts))
+
+    @property
+    def alerts(self) -> List[Dict]:
+        return [alert for batch in self.batches for alert in batch]
+
+
+class AlertDispatcher:
+    # Delivers alerts on a background thread so the polling loop never waits on a sink.
+    # Alerts are coalesced per opportunity, grouped into batches and sent at most
+    # max_batches_per_minute times a minute; when the queue is full the oldest alert is dropped.
+    def __init__(self, sinks: List[AlertSink], batch_size: int = 50, batch_window: float = 2.0,
+                 max_batches_per_minute: int = 20, max_queue_size: int = 1000):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.min_send_interval = 60.0 / max_batches_per_minute
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+        self.last_sent = 0.0
+        self.lock = threading.Lock()
+        self.worker = None
+
+    def publish(self, alerts: List[Dict]):
+        for alert in alerts:
+            while True:
+                try:
+                    self.queue.put_nowait(alert)
+                    break
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.queue.task_done()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        self.start()
+
+    def start(self):
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self.run, daemon=True)
+                self.worker.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def run(self):
+        while True:
+            batch = self.collect_batch()
+            wait = self.last_sent + self.min_send_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.deliver(coalesce_alerts(batch))
+            self.last_sent = time.monotonic()
+            for _ in batch:
+                self.queue.task_done()
+
+    def collect_batch(self) -> List[Dict]:
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def deliver(self, alerts: List[Dict]):
+        if not alerts:
+            return
+        for sink in self.sinks:
+            try:
+                sink.send(alerts)
+            except Exception as e:
+                print(f"Error sending alerts to {type(sink).__name__}: {e}")
+
+
+def coalesce_alerts(alerts: List[Dict]) -> List[Dict]:
+    pending: Dict[Tuple, Dict] = {}
+    for alert in alerts:
+        key = alert['key']
+        earlier = pending.get(key)
+        if earlier is None:
+            pending[key] = alert
+        elif earlier['event'] == 'opened' and alert['event'] == 'closed':
+            # Opened and closed again before anyone was told about it
+            del pending[key]
+        elif earlier['event'] == 'opened':
+            pending[key] = dict(alert, event='opened', previous=None)
+        elif earlier['event'] == 'closed' and alert['event'] == 'opened':
+            # Closed and reopened: subscribers never saw the close, so only an improvement is news
+            if opportunity_value(alert['opportunity']) > opportunity_value(earlier['opportunity']):
+                pending[key] = dict(alert, event='improved', previous=earlier['opportunity'])
+            else:
+                del pending[key]
+        else:
+            pending[key] = dict(alert, previous=earlier['previous'] or alert['previous'])
+    return list(pending.values())
+
+
+def alert_sinks_from_env() -> List[AlertSink]:
+    sinks = []
+    if os.environ.get('ALERT_STDOUT'):
+        sinks.append(StdoutAlertSink())
+    if os.environ.get('ALERT_FILE'):
+        sinks.append(FileAlertSink(os.environ['ALERT_FILE']))
+    if os.environ.get('ALERT_WEBHOOK_URL'):
+        sinks.append(WebhookAlertSink(os.environ['ALERT_WEBHOOK_URL']))
+    return sinks
+
+def poll_for_alerts(interval: float, iterations: Optional[int] = None, sinks: Optional[List[AlertSink]] = None):
+    # Alerts are only produced by this long-running loop: a serverless request is frozen as soon
+    # as its response is sent, which would strand anything still queued for delivery
+    tracker = OpportunityTracker(float(os.environ.get('ALERT_MIN_IMPROVEMENT', 0.5)))
+    dispatcher = AlertDispatcher(sinks or alert_sinks_from_env() or [StdoutAlertSink()])
+    count = 0
+    while iterations is None or count < iterations:
+        started = time.monotonic()
+        try:
+            sports_data = fetch_all_sports()
+            stale = [sport for sport, events in sports_data.items() if events.stale_for is not None]
+            if stale:
+                # Old snapshots say nothing about what changed; hold the tracker until the feeds
+                # recover or expire, at which point their opportunities are reported closed
+                print(f"Skipping alert update, stale feeds: {', '.join(stale)}")
+            else:
+                alerts = tracker.update(find_plus_ev_bets(sports_data), find_arbitrage_opportunities(sports_data))
+                if alerts:
+                    dispatcher.publish(alerts)
+        except Exception as e:
+            print(f"Error polling for alerts: {e}")
+        count += 1
+        if iterations is None or count < iterations:
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    dispatcher.flush()
+
    
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        # cfb_url = "https://www.lunosoftware.com/sportsdata/SportsDataService.svc/gamesOddsForDateWeek/3?&sportsbookIDList=1,89,83,28,87,85,8,86,98,100,101,139,119"
-        nfl_url = "https://www.lunosoftware.com/sportsdata/SportsDataService.svc/gamesOddsForDateWeek/2?&sportsbookIDList=1,89,83,28,87,85,8,86,98,100,101,139,119"
-        # mlb_url = "https://www.lunosoftware.com/sportsdata/SportsDataService.svc/gamesOddsForDateWeek/1?&sportsbookIDList=1,89,83,28,87,85,8,86,98,100,101,139,119"
-        nhl_url = "https://www.lunosoftware.com/sportsdata/SportsDataService.svc/gamesOddsForDateWeek/6?&sportsbookIDList=1,89,83,28,87,85,8,86,98,100,101,139,119"
-        nba_url = "https://www.lunosoftware.com/sportsdata/SportsDataService.svc/gamesOddsForDateWeek/4?&sportsbookIDList=1,89,83,28,87,85,8,86,98,100,101,139,119"
-
-
-        sports_data = {
-            # 'CFB': fetch_sports_data(cfb_url, CFBEvents),
-            'NFL': fetch_sports_data(nfl_url, NFLEvents),
-            # 'MLB': fetch_sports_data(mlb_url, MLBEvents),
-            'NBA': fetch_sports_data(nba_url, NBAEvents),
-            'NHL': fetch_sports_data(nhl_url, NHLEvents)
-        }
+        query = parse_qs(urlparse(self.path).query)
+        books = [book for value in query.get('books', []) for book in value.split(',') if book]
+        leagues = [league for value in query.get('leagues', []) for league in value.split(',') if league]
+        try:
+            active_registry = registry.narrow(books, leagues)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        try:
+            bankroll = float(query['bankroll'][0]) if 'bankroll' in query else None
+            kelly_fraction = float(query.get('kelly', ['0.25'])[0])
+            arb_stake = float(query.get('arb_stake', ['100'])[0])
+        except ValueError:
+            self.send_error(400, "bankroll, kelly and arb_stake must be numbers")
+            return
+        if not all(math.isfinite(value) for value in (bankroll or 0, kelly_fraction, arb_stake)):
+            self.send_error(400, "bankroll, kelly and arb_stake must be finite")
+            return
+        if arb_stake <= 0 or (bankroll is not None and bankroll < 0) or not 0 < kelly_fraction <= 1:
+            self.send_error(400, "arb_stake must be positive, bankroll non-negative and kelly in (0, 1]")
+            return
+
+        sports_data = fetch_all_sports(active_registry)
+
+        all_plus_ev_bets = find_plus_ev_bets(sports_data, active_registry)
+        all_arbitrage_opportunities = find_arbitrage_opportunities(sports_data, active_registry, arb_stake)
 
-        html_content = generate_html(sports_data)
+        if bankroll is not None:
+            all_plus_ev_bets = size_plus_ev_bets(all_plus_ev_bets, bankroll, kelly_fraction)
+
+        html_content = generate_html(sports_data, all_plus_ev_bets, all_arbitrage_opportunities, active_registry)
 
         self.send_response(200)
         self.send_header('Content-type', 'text/html')
         self.end_headers()
         self.wfile.write(html_content.encode())
-        return
\ No newline at end of file
+        return
+
+
+if __name__ == '__main__':
+    poll_for_alerts(float(os.environ.get('ALERT_POLL_INTERVAL', 60)))
@@ -0,0 +1,128 @@
+import index
+from index import AlertDispatcher, MemoryAlertSink, OpportunityTracker, coalesce_alerts
+
+
+def plus_ev_bet(ev, book='FanDuel', team='A'):
+    return {'sport': 'NFL', 'line_type': 'Full Game', 'game': 'A @ B', 'team': team,
+            'book': book, 'odds': 150, 'fair_odds': 140, 'ev': ev}
+
+def arbitrage(profit, stake=100):
+    return {'sport': 'NBA', 'game': 'C @ D', 'market': 'Moneyline', 'book1': 'FanDuel', 'odds1': 120,
+            'stake1': 49.44, 'team1': 'C', 'book2': 'DraftKings', 'odds2': 125, 'stake2': 50.56,
+            'team2': 'D', 'profit': profit, 'stake': stake, 'line_type': 'Full Game'}
+
+def events(alerts):
+    return [alert['event'] for alert in alerts]
+
+
+def test_tracker_reports_open_improve_and_close():
+    tracker = OpportunityTracker(min_improvement=0.5)
+    assert events(tracker.update([plus_ev_bet(2.0)], [arbitrage(1.0)])) == ['opened', 'opened']
+    assert events(tracker.update([plus_ev_bet(2.2)], [arbitrage(1.0)])) == []
+    alerts = tracker.update([plus_ev_bet(2.6)], [arbitrage(1.0)])
+    assert events(alerts) == ['improved']
+    assert alerts[0]['previous']['ev'] == 2.0
+    alerts = tracker.update([plus_ev_bet(2.1)], [])
+    assert events(alerts) == ['closed']
+    assert alerts[0]['kind'] == 'arbitrage'
+
+
+def test_tracker_ignores_bounces_below_notified_value():
+    tracker = OpportunityTracker(min_improvement=0.5)
+    sent = []
+    for ev in [5.0, 4.0, 4.6, 4.0, 4.6]:
+        sent += events(tracker.update([plus_ev_bet(ev)], []))
+    assert sent == ['opened']
+    assert events(tracker.update([plus_ev_bet(5.5)], [])) == ['improved']
+
+
+def test_tracker_closes_with_last_seen_value():
+    tracker = OpportunityTracker()
+    tracker.update([plus_ev_bet(5.0)], [])
+    tracker.update([plus_ev_bet(4.0)], [])
+    alerts = tracker.update([], [])
+    assert events(alerts) == ['closed']
+    assert alerts[0]['opportunity']['ev'] == 4.0
+
+
+def test_tracker_keys_books_separately():
+    tracker = OpportunityTracker()
+    tracker.update([plus_ev_bet(2.0)], [])
+    assert events(tracker.update([plus_ev_bet(2.0), plus_ev_bet(2.0, book='DraftKings')], [])) == ['opened']
+
+
+def test_coalesce_merges_alerts_for_the_same_opportunity():
+    tracker = OpportunityTracker()
+    opened = tracker.update([plus_ev_bet(2.0)], [])
+    improved = tracker.update([plus_ev_bet(3.0)], [])
+    closed = tracker.update([], [])
+    reopened_lower = tracker.update([plus_ev_bet(2.5)], [])
+
+    merged = coalesce_alerts(opened + improved)
+    assert events(merged) == ['opened']
+    assert merged[0]['opportunity']['ev'] == 3.0
+    assert coalesce_alerts(opened + improved + closed) == []
+    assert coalesce_alerts(closed + reopened_lower) == []
+
+    reopened_higher = [dict(reopened_lower[0], opportunity=plus_ev_bet(3.5))]
+    merged = coalesce_alerts(closed + reopened_higher)
+    assert events(merged) == ['improved']
+    assert merged[0]['previous']['ev'] == 3.0
+
+
+def test_dispatcher_batches_into_sinks():
+    sink = MemoryAlertSink()
+    dispatcher = AlertDispatcher([sink], batch_size=10, batch_window=0.2)
+    tracker = OpportunityTracker()
+    dispatcher.publish(tracker.update([plus_ev_bet(2.0)], []))
+    dispatcher.publish(tracker.update([plus_ev_bet(2.0), plus_ev_bet(2.0, team='B')], [arbitrage(1.0)]))
+    assert dispatcher.flush(timeout=5)
+    assert len(sink.batches) == 1
+    assert events(sink.alerts) == ['opened', 'opened', 'opened']
+
+
+def test_dispatcher_drops_oldest_when_queue_is_full():
+    sink = MemoryAlertSink()
+    dispatcher = AlertDispatcher([sink], batch_window=0.2, max_queue_size=2)
+    dispatcher.start = lambda: None
+    dispatcher.publish(OpportunityTracker().update([plus_ev_bet(2.0, book=book) for book in ['A', 'B', 'C']], []))
+    assert dispatcher.dropped == 1
+    assert [alert['opportunity']['book'] for alert in list(dispatcher.queue.queue)] == ['B', 'C']
+
+
+def test_dispatcher_survives_failing_sink():
+    class FailingSink(MemoryAlertSink):
+        def send(self, alerts):
+            raise RuntimeError('down')
+
+    sink = MemoryAlertSink()
+    dispatcher = AlertDispatcher([FailingSink(), sink], batch_window=0.05)
+    dispatcher.publish(OpportunityTracker().update([plus_ev_bet(2.0)], []))
+    assert dispatcher.flush(timeout=5)
+    assert events(sink.alerts) == ['opened']
+
+
+def test_poll_for_alerts_delivers_only_changes(monkeypatch):
+    snapshots = iter([[plus_ev_bet(2.0)], [plus_ev_bet(2.0)], [plus_ev_bet(3.0)]])
+    monkeypatch.setattr(index, 'fetch_all_sports', lambda: {})
+    monkeypatch.setattr(index, 'find_plus_ev_bets', lambda sports_data: next(snapshots))
+    monkeypatch.setattr(index, 'find_arbitrage_opportunities', lambda sports_data: [])
+    sink = MemoryAlertSink()
+    index.poll_for_alerts(0, iterations=3, sinks=[sink])
+    # Polls land inside one batch window, so the improvement is folded into the open
+    assert events(sink.alerts) == ['opened']
+    assert sink.alerts[0]['opportunity']['ev'] == 3.0
+
+
+def test_poll_for_alerts_holds_state_while_feeds_are_stale(monkeypatch):
+    stale = index.NFLEvents()
+    stale.stale_for = 120
+    snapshots = iter([[plus_ev_bet(2.0)], [plus_ev_bet(9.0)]])
+    feeds = iter([{'NFL': index.NFLEvents()}, {'NFL': stale}])
+    monkeypatch.setattr(index, 'fetch_all_sports', lambda: next(feeds))
+    monkeypatch.setattr(index, 'find_plus_ev_bets', lambda sports_data: next(snapshots))
+    monkeypatch.setattr(index, 'find_arbitrage_opportunities', lambda sports_data: [])
+    sink = MemoryAlertSink()
+    index.poll_for_alerts(0, iterations=2, sinks=[sink])
+    assert events(sink.alerts) == ['opened']
+    assert sink.alerts[0]['opportunity']['ev'] == 2.0
@@ -0,0 +1,76 @@
+import pytest
+
+from index import (DEFAULT_CONFIG, NFLEvents, NHLEvents, create_table, find_arbitrage_opportunities,
+                   find_plus_ev_bets, parse_registry_config)
+
+
+def event_data(odds):
+    return {'GameID': 1, 'StartTimeStr': '10/19/2026 19:00', 'AwayTeamName': 'A', 'HomeTeamName': 'B',
+            'Odds': [{'SportsbookID': book, 'LineType': line_type, 'AwayLine': away, 'HomeLine': home}
+                     for book, line_type, away, home in odds]}
+
+def sports_data(event_class, odds):
+    events = event_class()
+    events.add_event(event_data(odds))
+    return events
+
+ODDS = [(1, 1, -110, -110), (89, 1, 120, -140), (83, 1, -130, 125),
+        (1, 2, -110, -110), (89, 2, 120, -140), (83, 2, -130, 125)]
+
+
+def test_default_registry_builds_fetch_urls():
+    registry = parse_registry_config(DEFAULT_CONFIG)
+    assert list(registry.leagues) == ['NFL', 'NBA', 'NHL']
+    assert registry.league_url('NFL').endswith('gamesOddsForDateWeek/2?&sportsbookIDList=1,89,83,28,87,85,8,86,98,100,101,139,119')
+
+
+def test_request_narrowing_keeps_the_deployment_fetch_url():
+    deployment = parse_registry_config(DEFAULT_CONFIG)
+    registry = deployment.narrow(['fanduel', 'DraftKings'], ['nfl'])
+    assert list(registry.leagues) == ['NFL']
+    assert registry.league_url('NFL') == deployment.league_url('NFL')
+    assert [name for _, name in registry.columns] == ['FanDuel', 'DraftKings']
+    with pytest.raises(ValueError):
+        registry.narrow(['Nope'])
+
+
+def test_deployment_narrowing_keeps_sharp_book_in_fetch():
+    registry = parse_registry_config(DEFAULT_CONFIG).narrow(['fanduel', 'DraftKings'], keep_fetch_ids=False)
+    assert registry.fetch_ids == [89, 83, 1]
+
+
+def test_disabled_leagues_skip_line_type_check():
+    config = dict(DEFAULT_CONFIG, line_types={'4': 'First Period', '5': 'Second Period', '6': 'Third Period'},
+                  leagues={'CFB': {'sport_id': 3, 'enabled': False, 'line_types': [1, 2]},
+                           'NHL': {'sport_id': 6, 'enabled': True, 'line_types': [1, 4, 5, 6]}})
+    registry = parse_registry_config(config)
+    assert registry.line_types_for('NHL') == [4, 5, 6]
+
+
+def test_invalid_config_is_rejected():
+    with pytest.raises(ValueError):
+        parse_registry_config(dict(DEFAULT_CONFIG, sharp_books=[999]))
+    with pytest.raises(ValueError):
+        parse_registry_config(dict(DEFAULT_CONFIG, line_types={'3': 'Second Half'}))
+
+
+def test_narrowed_line_types_drive_tables_and_bets():
+    registry = parse_registry_config(dict(DEFAULT_CONFIG, line_types={'1': 'Game'}))
+    data = {'NFL': sports_data(NFLEvents, ODDS)}
+
+    bets = find_plus_ev_bets(data, registry)
+    arbs = find_arbitrage_opportunities(data, registry)
+    assert {bet['line_type'] for bet in bets} == {'Game'}
+    assert {arb['line_type'] for arb in arbs} == {'Game'}
+
+    table = create_table(data['NFL'], 'moneyline', registry, 'NFL')
+    assert table.count('<table>') == 1
+    assert '<h4>Game</h4>' in table
+
+
+def test_nhl_periods_follow_league_line_types():
+    registry = parse_registry_config(DEFAULT_CONFIG)
+    events = sports_data(NHLEvents, [(1, 1, -110, -110), (1, 4, -110, -110)])
+    table = create_table(events, 'moneyline', registry, 'NHL')
+    assert table.count('<table>') == 1
+    assert 'First Period' in table and 'Third Period' in table
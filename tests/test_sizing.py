@@ -0,0 +1,67 @@
+import io
+
+import pytest
+
+import index
+from index import calculate_kelly_fraction, optimize_market_fractions, size_plus_ev_bets
+
+
+def bet(team, book, odds, fair_odds=100):
+    return {'sport': 'NFL', 'game': 'A @ B', 'line_type': 'Full Game', 'team': team, 'book': book,
+            'odds': odds, 'fair_odds': fair_odds, 'ev': 0}
+
+
+def test_kelly_fraction_for_single_bet():
+    assert calculate_kelly_fraction(120, 100) == pytest.approx(1 / 12)
+    assert calculate_kelly_fraction(120, 100, 0.5) == pytest.approx(1 / 24)
+    assert calculate_kelly_fraction(-120, 100) == 0.0
+
+
+def test_market_fractions_cover_both_sides_of_an_arbitrage():
+    assert optimize_market_fractions([(0.5, 2.2)]) == [pytest.approx(1 / 12)]
+    assert optimize_market_fractions([(0.5, 2.2), (0.5, 2.25)]) == [pytest.approx(0.5), pytest.approx(0.5)]
+
+
+@pytest.mark.parametrize('outcomes', [[(0.51, 2.1), (0.51, 2.1)], [(0.53, 1.91), (0.53, 1.95)], [(0.6, 2.0), (0.6, 3.0)]])
+def test_market_fractions_never_exceed_bankroll_when_probabilities_overlap(outcomes):
+    # Rounded fair probabilities can add up past 1 across the sides of a market
+    fractions = optimize_market_fractions(outcomes)
+    assert all(fraction >= 0 for fraction in fractions)
+    assert sum(fractions) <= 1 + 1e-9
+
+
+def test_same_side_at_several_books_takes_best_price():
+    sized = size_plus_ev_bets([bet('A', 'FanDuel', 120), bet('A', 'DraftKings', 110), bet('B', 'Caesars', 125)],
+                              1000, kelly_fraction=1.0, max_bet_fraction=1.0, max_exposure=1.0)
+    assert [(b['book'], b['stake']) for b in sized] == [('FanDuel', 500.0), ('DraftKings', 0.0), ('Caesars', 500.0)]
+    assert [b['kelly'] for b in sized] == [50.0, 0.0, 50.0]
+
+
+def test_per_bet_cap_keeps_hedged_sides_in_proportion():
+    sized = size_plus_ev_bets([bet('A', 'FanDuel', 300, 200), bet('B', 'DraftKings', -150, -200)], 1000)
+    assert [b['stake'] for b in sized] == [25.0, 50.0]
+    assert max(b['stake'] for b in sized) == 50.0
+
+
+def test_slate_respects_bet_and_exposure_caps():
+    slate = [dict(bet('A', 'FanDuel', 150), game=f'G{i}') for i in range(20)]
+    sized = size_plus_ev_bets(slate, 1000, kelly_fraction=1.0, max_bet_fraction=0.05, max_exposure=0.5)
+    assert all(b['stake'] <= 50 for b in sized)
+    assert sum(b['stake'] for b in sized) == pytest.approx(500, abs=0.1)
+
+
+class RequestStub(index.handler):
+    def __init__(self, path):
+        self.path = path
+        self.wfile = io.BytesIO()
+        self.errors = []
+
+    def send_error(self, code, message=None):
+        self.errors.append(code)
+
+
+@pytest.mark.parametrize('query', ['bankroll=nan', 'bankroll=inf', 'arb_stake=inf', 'kelly=nan', 'bankroll=abc', 'kelly=2'])
+def test_handler_rejects_bad_sizing_parameters(query):
+    request = RequestStub(f'/?{query}')
+    request.do_GET()
+    assert request.errors == [400]
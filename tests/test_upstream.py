@@ -0,0 +1,186 @@
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import index
+from index import NFLEvents, UpstreamClient, UpstreamError
+
+GAMES = [{'GameID': 1, 'StartTimeStr': '10/19/2026 19:00', 'AwayTeamName': 'A', 'HomeTeamName': 'B', 'Odds': []}]
+
+
+class StubUpstream(BaseHTTPRequestHandler):
+    # Replays the scripted responses in `server.script`, repeating the last one
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        action = server.script[min(len(server.requests) - 1, len(server.script) - 1)]
+        if action == 'hang':
+            time.sleep(server.hang)
+            return
+        if isinstance(action, int):
+            self.send_response(action)
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = gzip.compress(json.dumps(GAMES).encode())
+        self.send_response(200)
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubUpstream)
+    server.daemon_threads = True
+    server.script = ['ok']
+    server.requests = []
+    server.hang = 1.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f'http://127.0.0.1:{server.server_port}/feed'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(**kwargs):
+    settings = dict(timeout=1, backoff_base=0.01, backoff_cap=0.05, session=requests.Session())
+    settings.update(kwargs)
+    return UpstreamClient(**settings)
+
+
+def test_retries_transient_failures(upstream):
+    upstream.script = [503, 502, 'ok']
+    assert make_client().fetch_json(upstream.url) == GAMES
+    assert len(upstream.requests) == 3
+    assert 'gzip' in upstream.requests[0]['Accept-Encoding']
+
+
+def test_client_errors_are_not_retried(upstream):
+    upstream.script = [404]
+    with pytest.raises(UpstreamError):
+        make_client().fetch_json(upstream.url)
+    assert len(upstream.requests) == 1
+
+
+def test_unchanged_feed_reuses_snapshot_and_parsed_events(upstream, monkeypatch):
+    monkeypatch.setattr(index, 'upstream_client', make_client())
+    monkeypatch.setattr(index, 'parsed_feeds', {})
+    first = index.fetch_sports_data(upstream.url, NFLEvents)
+    second = index.fetch_sports_data(upstream.url, NFLEvents)
+    assert second is first
+    assert len(first.events) == 1
+    assert upstream.requests[1]['If-None-Match'] == '"v1"'
+
+
+def test_open_circuit_serves_snapshot_without_network(upstream):
+    client = make_client(max_retries=0, failure_threshold=2, reset_timeout=0.3)
+    snapshot = client.fetch_json(upstream.url)
+    upstream.script = ['ok', 503]
+    assert client.fetch_json(upstream.url) is snapshot
+    assert client.fetch_json(upstream.url) is snapshot
+    requests_before = len(upstream.requests)
+    assert client.fetch_json(upstream.url) is snapshot
+    assert len(upstream.requests) == requests_before
+
+    time.sleep(0.35)
+    upstream.script = ['ok']
+    upstream.requests.clear()
+    assert client.fetch_json(upstream.url) is snapshot
+    assert client.feeds[upstream.url].opened_at is None
+
+
+def test_hung_upstream_serves_snapshot_after_one_timeout(upstream):
+    client = make_client(timeout=0.2)
+    snapshot = client.fetch_json(upstream.url)
+    upstream.script = ['ok', 'hang']
+    started = time.monotonic()
+    assert client.fetch_json(upstream.url) is snapshot
+    assert time.monotonic() - started < 0.6
+    assert len(upstream.requests) == 2
+
+
+def test_hung_upstream_without_snapshot_stops_at_deadline(upstream):
+    upstream.script = ['hang']
+    client = make_client(timeout=0.3, max_retries=5, deadline=0.5)
+    started = time.monotonic()
+    with pytest.raises(UpstreamError):
+        client.fetch_json(upstream.url)
+    assert time.monotonic() - started < 1.0
+
+
+def test_unreachable_feed_renders_as_empty(monkeypatch):
+    monkeypatch.setattr(index, 'upstream_client', make_client(max_retries=0))
+    monkeypatch.setattr(index, 'parsed_feeds', {})
+    assert index.fetch_sports_data('http://127.0.0.1:1/feed', NFLEvents).events == []
+
+
+def test_feeds_are_fetched_concurrently(upstream, monkeypatch):
+    upstream.script = ['hang']
+    monkeypatch.setattr(index, 'upstream_client', make_client(timeout=0.3, deadline=0.4))
+    monkeypatch.setattr(index, 'parsed_feeds', {})
+    base_url = f'http://127.0.0.1:{upstream.server_port}/{{sport_id}}?books={{sportsbook_ids}}'
+    registry = index.parse_registry_config(dict(index.DEFAULT_CONFIG, base_url=base_url))
+    started = time.monotonic()
+    sports_data = index.fetch_all_sports(registry)
+    assert time.monotonic() - started < 0.8
+    assert list(sports_data) == ['NFL', 'NBA', 'NHL']
+    assert all(events.events == [] for events in sports_data.values())
+
+
+def test_backoff_overshooting_the_deadline_stops_cleanly(upstream, monkeypatch):
+    upstream.script = [503]
+    client = make_client(deadline=0.3)
+    client.backoff_delay = lambda attempt, error: 0.2
+    real_sleep = time.sleep
+    monkeypatch.setattr(index.time, 'sleep', lambda seconds: real_sleep(seconds + 0.15))
+    with pytest.raises(UpstreamError):
+        client.fetch_json(upstream.url)
+    assert len(upstream.requests) == 1
+
+
+def test_rejected_request_becomes_upstream_error():
+    class RejectingSession(requests.Session):
+        def get(self, *args, **kwargs):
+            raise ValueError('Attempted to set connect timeout to -0.001')
+
+    client = make_client(session=RejectingSession())
+    with pytest.raises(UpstreamError):
+        client.fetch_json('http://127.0.0.1:1/feed')
+
+
+def test_snapshot_expires_after_max_stale(upstream, monkeypatch):
+    client = make_client(max_retries=0, max_stale=0.3)
+    monkeypatch.setattr(index, 'upstream_client', client)
+    monkeypatch.setattr(index, 'parsed_feeds', {})
+    assert index.fetch_sports_data(upstream.url, NFLEvents).stale_for is None
+
+    upstream.script = ['ok', 503]
+    events = index.fetch_sports_data(upstream.url, NFLEvents)
+    assert len(events.events) == 1
+    assert events.stale_for is not None
+
+    time.sleep(0.35)
+    events = index.fetch_sports_data(upstream.url, NFLEvents)
+    assert events.events == []
+    assert events.stale_for is None
+
+
+def test_stale_feed_is_flagged_on_the_page():
+    events = NFLEvents()
+    events.stale_for = 600
+    assert 'NFL odds could not be refreshed; showing data from 10 min ago' in index.generate_html({'NFL': events}, [], [])